@@ -7,46 +7,86 @@ Usage:
     just test-rust-categorize  # analyzes saved output (no recompilation)
 """
 
+import functools
 import sys
 import re
 from collections import defaultdict
 
-
+# Optional fast path: google-re2 is a drop-in replacement whose linear-time
+# engine is much faster on the big literal alternations below. Falls back to
+# the stdlib engine when not installed.
+try:
+    import re2 as re_mod
+except ImportError:
+    re_mod = re
+
+# Precompiled patterns for the hot parsing loop (avoids re._cache lookups per line)
+_TYPE_RE = re.compile(r"type '(\w+)'")
+# One pattern classifies a suite line in a single match call (codegen must come
+# before plain fail — both start with ✗)
+_SUITE_RE = re_mod.compile(
+    r'\s*(?:'
+    r'[✗]\s+(?P<codegen>\S+): CLI failed:'
+    r'|[✗]\s+(?P<fail>\S+):'
+    r'|[✓]\s+(?P<pass>\S+):'
+    r')'
+)
+_TEST_RE = re.compile(r'\s+- (.+?):\s+(encode error|encode mismatch|decode error|decode mismatch):\s*(.*)')
+
+# Suite-name keywords per mismatch feature area
+_POS_KWS = [
+    "position_field", "basic_position", "nested_position", "multiple_position",
+    "deep_nesting_position", "memory_efficient_position", "negative_position",
+    "lazy_evaluation", "circular_reference", "mixed_inline_standalone",
+    "no_alignment", "negative_position_alignment",
+]
+_FLC_KWS = [
+    "first_element", "last_element", "corresponding",
+    "empty_array_correlation", "aggregate_size",
+    "zip_style",
+]
+
+# One compiled alternation per feature area, tested sequentially: family
+# priority must match the original check order, which a single merged
+# leftmost-match regex cannot encode (e.g. ^context_ would always win at
+# offset 0 over a zip_style keyword later in the name)
+_POS_KWS_RE = re_mod.compile('|'.join(map(re.escape, _POS_KWS)))
+_FLC_KWS_RE = re_mod.compile('|'.join(map(re.escape, _FLC_KWS)))
+
+# Sub-features within context_ suites, checked in priority order. A single
+# leftmost-match regex would invert priority here: error_ sits early in names
+# like context_error_first_selector_no_match and would shadow the selector
+# needles appearing later in the string.
+_CTX_CATEGORIES = (
+    ("first_selector", "mismatch: first/last/corresponding selectors"),
+    ("last_selector", "mismatch: first/last/corresponding selectors"),
+    ("corresponding", "mismatch: first/last/corresponding selectors"),
+    ("sum_of_type_sizes", "mismatch: sum_of_type_sizes computed fields"),
+    ("extension", "mismatch: context extension"),
+    ("error_", "mismatch: context error handling"),
+)
+
+
+@functools.lru_cache(maxsize=4096)
 def categorize_encode_mismatch(suite_name: str) -> str:
     """Sub-categorize encode mismatches using the suite name to infer feature area."""
 
     # Position fields / seekable streams / instance fields
-    if any(kw in suite_name for kw in [
-        "position_field", "basic_position", "nested_position", "multiple_position",
-        "deep_nesting_position", "memory_efficient_position", "negative_position",
-        "lazy_evaluation", "circular_reference", "mixed_inline_standalone",
-        "no_alignment", "negative_position_alignment",
-    ]):
+    if _POS_KWS_RE.search(suite_name):
         return "mismatch: position/seekable fields (instance)"
 
     if "instance" in suite_name or suite_name.startswith("pcf_"):
         return "mismatch: instance fields"
 
     # first/last/corresponding selectors
-    if any(kw in suite_name for kw in [
-        "first_element", "last_element", "corresponding",
-        "empty_array_correlation", "aggregate_size",
-        "zip_style",
-    ]):
+    if _FLC_KWS_RE.search(suite_name):
         return "mismatch: first/last/corresponding selectors"
 
     # Context features (extension, sum_of_type_sizes, etc.)
     if suite_name.startswith("context_"):
-        if "first_selector" in suite_name or "last_selector" in suite_name:
-            return "mismatch: first/last/corresponding selectors"
-        if "corresponding" in suite_name:
-            return "mismatch: first/last/corresponding selectors"
-        if "sum_of_type_sizes" in suite_name:
-            return "mismatch: sum_of_type_sizes computed fields"
-        if "extension" in suite_name:
-            return "mismatch: context extension"
-        if "error_" in suite_name:
-            return "mismatch: context error handling"
+        for needle, label in _CTX_CATEGORIES:
+            if needle in suite_name:
+                return label
         return "mismatch: context (other)"
 
     # DNS compression
@@ -61,158 +101,177 @@ def categorize_encode_mismatch(suite_name: str) -> str:
     if "optional_builtin_bit" in suite_name:
         return "mismatch: optional bit-level fields"
 
-    return f"mismatch: uncategorized ({suite_name})"
+    return _intern(f"mismatch: uncategorized ({suite_name})")
+
+
+# Dynamically built category labels repeat across failures; dedupe them so
+# dict lookups on the category key become pointer compares
+_intern_cache = {}
+
+
+def _intern(s: str) -> str:
+    return _intern_cache.setdefault(s, s)
+
 
+def _trunc(s: str, n: int = 60) -> str:
+    return s if len(s) <= n else s[:n] + '...'
 
-def categorize_error(error_msg: str, suite_name: str = "") -> str:
-    """Categorize a test failure error message into a bucket."""
 
-    # Code generation failures
-    if "CLI failed" in error_msg:
-        if "_root references" in error_msg:
-            return "codegen: _root references (unsupported)"
-        if "from_after_field" in error_msg:
-            return "codegen: from_after_field (unsupported)"
-        return "codegen: other"
+def _categorize_codegen(detail: str, suite_name: str) -> str:
+    if "_root references" in detail:
+        return "codegen: _root references (unsupported)"
+    if "from_after_field" in detail:
+        return "codegen: from_after_field (unsupported)"
+    return "codegen: other"
 
-    # Encode errors
-    if "encode error:" in error_msg:
-        after = error_msg.split("encode error:", 1)[1].strip()
 
-        if "Parent field" in after:
-            if "[corresponding<" in after or "[first<" in after or "[last<" in after:
-                return "encode error: parent field with selector (first/last/corresponding)"
-            if "not found" in after:
-                return "encode error: parent field not found (context passing)"
+def _categorize_encode_error(detail: str, suite_name: str) -> str:
+    after = detail.strip()
 
-        if "Not implemented: encoding composite variant" in after:
-            return "encode error: composite variant encoding (variant_terminated)"
+    if "Parent field" in after:
+        if "[corresponding<" in after or "[first<" in after or "[last<" in after:
+            return "encode error: parent field with selector (first/last/corresponding)"
+        if "not found" in after:
+            return "encode error: parent field not found (context passing)"
 
-        if "Not implemented: encoding field" in after:
-            if "varlength" in after:
-                return "encode error: varlength field (ASN.1/DER)"
-            if "type '" in after:
-                type_match = re.search(r"type '(\w+)'", after)
-                type_name = type_match.group(1) if type_match else "unknown"
-                return f"encode error: not implemented field type '{type_name}'"
-            return "encode error: not implemented (other)"
+    if "Not implemented: encoding composite variant" in after:
+        return "encode error: composite variant encoding (variant_terminated)"
 
-        if "Not implemented: encoding array" in after:
-            return "encode error: array in choice variant"
+    if "Not implemented: encoding field" in after:
+        if "varlength" in after:
+            return "encode error: varlength field (ASN.1/DER)"
+        if "type '" in after:
+            type_match = _TYPE_RE.search(after)
+            type_name = type_match.group(1) if type_match else "unknown"
+            return _intern(f"encode error: not implemented field type '{type_name}'")
+        return "encode error: not implemented (other)"
 
-        return f"encode error: other ({after[:60]}...)" if len(after) > 60 else f"encode error: other ({after})"
+    if "Not implemented: encoding array" in after:
+        return "encode error: array in choice variant"
 
-    # Encode mismatches - sub-categorize by suite name
-    if "encode mismatch:" in error_msg:
-        return categorize_encode_mismatch(suite_name)
+    return _intern(f"encode error: other ({_trunc(after)})")
 
-    # Decode errors
-    if "decode error:" in error_msg:
-        after = error_msg.split("decode error:", 1)[1].strip()
-        if "Unexpected end of input" in after:
-            return "decode error: unexpected end of input"
-        if "Invalid variant discriminator" in after:
-            return "decode error: invalid variant discriminator"
-        return f"decode error: other ({after[:60]}...)" if len(after) > 60 else f"decode error: other ({after})"
 
-    # Decode mismatches
-    if "decode mismatch:" in error_msg:
-        return "decode mismatch (wrong value decoded)"
+def _categorize_decode_error(detail: str, suite_name: str) -> str:
+    after = detail.strip()
+    if "Unexpected end of input" in after:
+        return "decode error: unexpected end of input"
+    if "Invalid variant discriminator" in after:
+        return "decode error: invalid variant discriminator"
+    return _intern(f"decode error: other ({_trunc(after)})")
 
-    return f"uncategorized ({error_msg[:80]}...)" if len(error_msg) > 80 else f"uncategorized ({error_msg})"
+
+# O(1) dispatch on the already-parsed error type instead of substring probes
+# over the full message
+_DISPATCH = {
+    "CLI failed": _categorize_codegen,
+    "encode error": _categorize_encode_error,
+    "encode mismatch": lambda detail, suite_name: categorize_encode_mismatch(suite_name),
+    "decode error": _categorize_decode_error,
+    "decode mismatch": lambda detail, suite_name: "decode mismatch (wrong value decoded)",
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def categorize_error(error_type: str, error_detail: str, suite_name: str = "") -> str:
+    """Categorize a test failure into a bucket given its parsed error type."""
+    handler = _DISPATCH.get(error_type)
+    if handler is not None:
+        return handler(error_detail, suite_name)
+    return _intern(f"uncategorized ({_trunc(f'{error_type}: {error_detail}', 80)})")
 
 
 def main():
-    lines = sys.stdin.readlines()
+    lines = sys.stdin.read().splitlines()
 
     # Parse test output
     current_suite = None
     suite_status = {}  # suite -> "pass" | "fail" | "codegen_fail"
-    failures = []  # list of (suite, test_desc, error_msg, category)
-
-    for line in lines:
-        line = line.rstrip()
-
-        # Detect suite lines
-        pass_match = re.match(r'\s*[✓]\s+(\S+):', line)
-        fail_match = re.match(r'\s*[✗]\s+(\S+):', line)
-        codegen_match = re.match(r'\s*[✗]\s+(\S+): CLI failed:', line)
-
-        if codegen_match:
-            suite = codegen_match.group(1)
-            current_suite = suite
-            category = categorize_error(line.strip(), suite)
-            failures.append((suite, "(code generation)", line.strip(), category))
-            suite_status[suite] = "codegen_fail"
-        elif fail_match:
-            suite = fail_match.group(1)
-            current_suite = suite
-            suite_status[suite] = "fail"
-        elif pass_match:
-            suite = pass_match.group(1)
-            current_suite = suite
-            if suite not in suite_status:
-                suite_status[suite] = "pass"
-
-        # Detect individual test failure lines
-        test_match = re.match(r'\s+- (.+?):\s+(encode error|encode mismatch|decode error|decode mismatch):\s*(.*)', line)
-        if test_match and current_suite:
-            test_desc = test_match.group(1)
-            error_type = test_match.group(2)
-            error_detail = test_match.group(3)
-            full_error = f"{error_type}: {error_detail}"
-            category = categorize_error(full_error, current_suite)
-            failures.append((current_suite, test_desc, full_error, category))
-
-    # Group by category
-    by_category = defaultdict(list)
-    for suite, test_desc, error_msg, category in failures:
-        by_category[category].append((suite, test_desc))
+    results = defaultdict(lambda: defaultdict(list))  # category -> suite -> [test_desc]
+    summary_idx = None
+
+    for i, line in enumerate(lines):
+        if summary_idx is None and "=== SUMMARY ===" in line:
+            summary_idx = i
+
+        # Detect suite lines (single match call classifies the line); suite
+        # lines always carry a ✓/✗ marker, so cheap substring gates skip the
+        # regex on everything else
+        suite_match = _SUITE_RE.match(line) if '✗' in line or '✓' in line else None
+
+        if suite_match:
+            if suite_match.group("codegen"):
+                suite = suite_match.group("codegen")
+                current_suite = suite
+                category = categorize_error("CLI failed", line.strip(), suite)
+                results[category][suite].append("(code generation)")
+                suite_status[suite] = "codegen_fail"
+            elif suite_match.group("fail"):
+                suite = suite_match.group("fail")
+                current_suite = suite
+                suite_status[suite] = "fail"
+            else:
+                suite = suite_match.group("pass")
+                current_suite = suite
+                if suite not in suite_status:
+                    suite_status[suite] = "pass"
+
+        # Detect individual test failure lines (cheap substring gate before regex)
+        if current_suite and ' - ' in line and ('error' in line or 'mismatch' in line):
+            test_match = _TEST_RE.match(line)
+            if test_match:
+                test_desc = test_match.group(1)
+                error_type = test_match.group(2)
+                error_detail = test_match.group(3)
+                category = categorize_error(error_type, error_detail, current_suite)
+                results[category][current_suite].append(test_desc)
+
+    # Buffer the report and write it in one go — one stdout acquisition
+    # instead of one per print call
+    out = []
 
     # Summary line from original output
-    for line in lines:
-        if "=== SUMMARY ===" in line:
-            idx = lines.index(line)
-            print("=" * 70)
-            print("ORIGINAL SUMMARY")
-            print("=" * 70)
-            for summary_line in lines[idx:idx+10]:
-                summary_line = summary_line.strip()
-                if summary_line:
-                    print(f"  {summary_line}")
-            print()
-            break
+    if summary_idx is not None:
+        out.append("=" * 70)
+        out.append("ORIGINAL SUMMARY")
+        out.append("=" * 70)
+        for summary_line in lines[summary_idx:summary_idx+10]:
+            summary_line = summary_line.strip()
+            if summary_line:
+                out.append(f"  {summary_line}")
+        out.append("")
 
     # Print categorized failures
-    print("=" * 70)
-    print("FAILURE CATEGORIES (sorted by count)")
-    print("=" * 70)
+    out.append("=" * 70)
+    out.append("FAILURE CATEGORIES (sorted by count)")
+    out.append("=" * 70)
 
-    sorted_categories = sorted(by_category.items(), key=lambda x: -len(x[1]))
+    # Sort everything once up front so the print loop does no key work
+    report = [
+        (sum(len(tests) for tests in suites.values()), category, sorted(suites.items()))
+        for category, suites in results.items()
+    ]
+    report.sort(key=lambda entry: -entry[0])
 
     total_failures = 0
-    for category, items in sorted_categories:
-        count = len(items)
+    for count, category, suite_items in report:
         total_failures += count
-        print(f"\n  [{count:3d}] {category}")
-
-        # Group by suite within category
-        suites = defaultdict(list)
-        for suite, test_desc in items:
-            suites[suite].append(test_desc)
+        out.append(f"\n  [{count:3d}] {category}")
 
-        for suite, tests in sorted(suites.items()):
+        for suite, tests in suite_items:
             if len(tests) == 1 and tests[0] == "(code generation)":
-                print(f"         {suite}")
+                out.append(f"         {suite}")
             else:
-                print(f"         {suite} ({len(tests)} tests)")
+                out.append(f"         {suite} ({len(tests)} tests)")
                 for t in tests:
-                    print(f"           - {t}")
+                    out.append(f"           - {t}")
+
+    out.append(f"\n{'=' * 70}")
+    out.append(f"  Total individual failures: {total_failures}")
+    out.append(f"  Categories: {len(report)}")
+    out.append(f"{'=' * 70}")
 
-    print(f"\n{'=' * 70}")
-    print(f"  Total individual failures: {total_failures}")
-    print(f"  Categories: {len(sorted_categories)}")
-    print(f"{'=' * 70}")
+    sys.stdout.write('\n'.join(out) + '\n')
 
 
 if __name__ == "__main__":